@@ -1,23 +1,55 @@
+import time
 import typing
 import simpleaudio as sa
 import numpy as np
 
 class SoundFactory:
+    # Cache of generated audio buffers keyed by (seconds, frequency). The
+    # app only ever asks for a couple of distinct tones, so the sine
+    # generation and int16 conversion are paid once per tone
+    _audio_cache: typing.Dict[typing.Tuple[float, float], np.ndarray] = {}
+
     def create_audio(self, seconds: float, frequency: float):
         fs = 44100
 
-        t = np.linspace(0, seconds, seconds * fs, False)
-        note = np.sin(frequency * t * 2 * np.pi)
+        key = (round(seconds, 3), round(frequency, 3))
+        audio = SoundFactory._audio_cache.get(key)
+
+        if audio is None:
+            # np.linspace rejects a non-integer sample count on current
+            # NumPy; an arange over the sample index is also cheaper and
+            # gives an exactly uniform grid. float32 is plenty for audio
+            # that ends up as int16 anyway
+            n = int(seconds * fs)
+            note = np.sin((2 * np.pi * frequency / fs) * np.arange(n, dtype=np.float32))
 
-        audio = note * (2**15 - 1) / np.max(np.abs(note))
-        audio = audio.astype(np.int16)
+            # |sin| <= 1 by construction, so scale straight to the int16
+            # range instead of scanning the array for its maximum first
+            audio = ((2**15 - 1) * note).astype(np.int16)
+            SoundFactory._audio_cache[key] = audio
 
         return Sound(audio, fs)
 
 class Sound:
-    def __init__(self, audio_data_array: np.ndarray, frequency: float):
-        self._sound_data = audio_data_array
-        self.frequency = frequency
+    # Minimum spacing between two triggers of the same sound, in seconds.
+    # Several balls can land in one frame; layering the identical tone a
+    # few ms apart just costs mixer work without being audible
+    _REPLAY_COOLDOWN = 0.02
+
+    def __init__(self, audio_data_array: np.ndarray, sample_rate: int):
+        # Convert the samples to an immutable bytes object once so every
+        # play() skips the buffer-protocol handshake on the NumPy array
+        # (and simpleaudio can never alias the mutable buffer)
+        self._sound_bytes = audio_data_array.tobytes()
+        self.sample_rate = sample_rate
+        self._last_play = 0.0
 
     def play(self):
-        sa.play_buffer(self._sound_data, 1, 2, self.frequency)
\ No newline at end of file
+        # play_buffer is already asynchronous, so the only cost to guard
+        # against is re-triggering the mixer in rapid succession
+        now = time.monotonic()
+        if now - self._last_play < self._REPLAY_COOLDOWN:
+            return
+
+        self._last_play = now
+        sa.play_buffer(self._sound_bytes, 1, 2, self.sample_rate)
\ No newline at end of file
@@ -1,10 +1,14 @@
 import time
-from collections import OrderedDict
-from typing import Tuple, OrderedDict, List
+from typing import Tuple, Dict
 from dataclasses import dataclass
 
 import numpy as np
-from scipy.spatial import distance as dist
+from scipy.optimize import linear_sum_assignment
+
+# Sentinel distance used to mark pairs that must never be matched. A large
+# finite value is used instead of infinity so that the assignment solver
+# still converges
+UNMATCHABLE_DIST = 1e9
 
 @dataclass
 class JuggleDetails:
@@ -19,13 +23,76 @@ class JuggleDetails:
     def max_height(self) -> int:
         return self.max_height_centroid[1]
 
+def _match_centroids(object_centroids, input_centroids, object_falling_states,
+                     reacquisition_dist):
+    """ Numeric core of the matching step. Works purely on arrays so the
+        whole computation stays inside NumPy/SciPy C code. Returns the
+        optimal (rows, cols) assignment pairs together with the
+        squared-distance matrix used to produce them
+    """
+    # Compute the squared distance between each pair of object
+    # centroids and input centroids directly with a broadcasted
+    # subtraction -- our goal will be to match an input centroid
+    # to an existing object centroid. For the handful of balls we
+    # track, cdist's dispatch overhead outweighs the maths, and
+    # squared distances rank pairs the same way so the sqrt is
+    # skipped entirely
+    obj_arr = np.asarray(object_centroids, dtype=np.int32)
+    diff = (obj_arr[:, None, :] - input_centroids[None, :, :]).astype(np.float32)
+    D = np.einsum('ijk,ijk->ij', diff, diff)
+
+    # Calculate the y coordinate difference between the stored object
+    # centroids and input centroids with a single broadcasted
+    # subtraction. This tells us whether an input centroid is
+    # above/below the stored object centroid
+    pos_diff_y = obj_arr[:, 1:2] - input_centroids[:, 1]
+
+    # Filter out results that are outside of object centroid's requisition
+    # range by setting their distance to the unmatchable sentinel with a
+    # single boolean mask store. This will make sure that we don't consider
+    # these distances for reacquisition
+    # NOTE: D holds squared distances so the threshold is squared too
+    D[D > reacquisition_dist ** 2] = UNMATCHABLE_DIST
+
+    # For the objects that are already falling, filter out the results
+    # where the input object is travelling up by setting their distance
+    # to the unmatchable sentinel. This will make sure that we don't
+    # consider this distance for reacquisition
+    # NOTE: if the ball is closer to the ground, pos_diff_y is positive
+    falling = np.asarray(object_falling_states, dtype=bool)[:, None]
+    D[falling & (pos_diff_y > 0)] = UNMATCHABLE_DIST
+
+    # If the masking ruled out every pair (e.g. all the balls moved out of
+    # range during a short detection gap), skip the assignment solve
+    # entirely -- it could only produce pairs the caller would discard
+    if (D >= UNMATCHABLE_DIST).all():
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, D
+
+    # Solve the optimal one-to-one assignment between the tracked
+    # object centroids and the input centroids (Hungarian method).
+    # This replaces the previous greedy smallest-distance-first
+    # matching and guarantees a minimum total distance pairing
+    rows, cols = linear_sum_assignment(D)
+
+    return rows, cols, D
+
 class CentroidTracker():
     """ Used to identify and track the same balls between frames """
     def __init__(self, reacquisition_dist = 50, max_disappeared_time=0.2):
         self.next_object_id = 0
-        self.objects: OrderedDict[int, JuggleDetails] = OrderedDict()
 
-        # Store the time that a given object is allowed to be marked 
+        # The tracked ball state is kept as a struct-of-arrays: one row per
+        # ball across all of the parallel arrays below. This feeds the
+        # matching maths contiguous arrays directly instead of rebuilding
+        # them from per-ball objects on every frame
+        self._ids = np.empty(0, dtype=np.int64)
+        self._centroid_xy = np.empty((0, 2), dtype=np.int32)
+        self._max_height_xy = np.empty((0, 2), dtype=np.int32)
+        self._last_seen = np.empty(0, dtype=np.float64)
+        self._is_falling = np.empty(0, dtype=bool)
+
+        # Store the time that a given object is allowed to be marked
         # as "disappeared" until we need to deregister the object from tracking
         self.max_disappeared_time = max_disappeared_time
 
@@ -33,179 +100,122 @@ class CentroidTracker():
         # a centroid when it has been marked as "disappeared"
         self.reacquisition_dist = reacquisition_dist
 
-    def register(self, centroid):
+    def register(self, centroid, timestamp = None):
         # When registering an object we use the next available object
-        # ID to store the centroid
-        self.objects[self.next_object_id] = JuggleDetails(
-            centroid = tuple(centroid),
-            max_height_centroid = tuple(centroid),
-            last_seen_timestamp = time.time()
-        )
+        # ID and append one row to each of the parallel state arrays
+        if timestamp is None:
+            timestamp = time.time()
+
+        self._ids = np.append(self._ids, self.next_object_id)
+        self._centroid_xy = np.vstack((self._centroid_xy, np.asarray(centroid, dtype=np.int32)))
+        self._max_height_xy = np.vstack((self._max_height_xy, np.asarray(centroid, dtype=np.int32)))
+        self._last_seen = np.append(self._last_seen, timestamp)
+        self._is_falling = np.append(self._is_falling, False)
         self.next_object_id += 1
 
-    def remove_disappeared_balls(self):
+    def remove_disappeared_balls(self, now = None):
         """ Go through all the currently tracked objects and remove the ones
             that have not been seen for more than allowed time
         """
-        # Build a list of objects that havent disappeared for too long
-        new_objects_dict: OrderedDict[int, JuggleDetails] = OrderedDict()
-
-        for ball_key, ball_value in self.objects.items():
-            # Check if we have reached a maximum time that an object can stay
-            # disappeared for, and if we did then deregister it
-            time_since_disappeared = time.time() - ball_value.last_seen_timestamp
-            if time_since_disappeared < self.max_disappeared_time:
-                new_objects_dict[ball_key] = ball_value
-
-        # Override objects dict with a dict that doesnt had disappeared balls
-        self.objects = new_objects_dict
-    
-    def check_if_falling(self, old_centroid, new_centroid):
-        """ Check if the ball is lower than previously recorded. This means 
-            that the ball has reached has reached its max height in the 
-            previous frame. Returns true if the balls is falling.
-        """
-        # NOTE: if the ball is closer to the ground, it's y-coord number will be HIGHER
-        return old_centroid[1] < new_centroid[1]
-
-    def set_objects_centroid(self, object_id: int, centroid: Tuple[int, int]):
-        """ Set the objects current centroid position and update
-            the object's max height centroid if the new position
-            is heigher than the previous max height centroid
-        """
-        self.objects[object_id].centroid = centroid
-
-        if (centroid[1] < self.objects[object_id].max_height_centroid[1]):
-            self.objects[object_id].max_height_centroid = centroid
-        
+        if now is None:
+            now = time.time()
+
+        # Check if we have reached a maximum time that an object can stay
+        # disappeared for, and if we did then deregister it. With the
+        # struct-of-arrays state this is a single vectorized compaction
+        keep = (now - self._last_seen) < self.max_disappeared_time
+
+        if not keep.all():
+            self._ids = self._ids[keep]
+            self._centroid_xy = self._centroid_xy[keep]
+            self._max_height_xy = self._max_height_xy[keep]
+            self._last_seen = self._last_seen[keep]
+            self._is_falling = self._is_falling[keep]
+
+    def _as_details_dict(self) -> Dict[int, JuggleDetails]:
+        """ Build the object id -> JuggleDetails mapping that callers consume.
+            Plain dicts preserve insertion order since Python 3.7 so an
+            OrderedDict is no longer needed """
+        objects: Dict[int, JuggleDetails] = {}
+        for i in range(len(self._ids)):
+            objects[int(self._ids[i])] = JuggleDetails(
+                centroid = tuple(self._centroid_xy[i]),
+                max_height_centroid = tuple(self._max_height_xy[i]),
+                last_seen_timestamp = float(self._last_seen[i]),
+                is_falling = bool(self._is_falling[i])
+            )
+        return objects
 
     def update(self, rects):
-        self.remove_disappeared_balls()
+        # All the timing decisions within one frame should use the same
+        # "now", so read the clock once instead of once per ball
+        now = time.time()
+
+        self.remove_disappeared_balls(now)
 
         # Check to see if the list of input bounding box rectangles
         # is empty
         if len(rects) == 0:
             # Return early as there are no centroids or tracking info
             # to update
-            return self.objects
-
-        # Initialize an array of input centroids for the current frame
-        input_centroids = np.zeros((len(rects), 2), dtype="int")
+            return self._as_details_dict()
 
-        # Loop over the bounding box rectangles
-        for (i, (startX, startY, endX, endY)) in enumerate(rects):
-            # Use the bounding box coordinates to derive the centroid
-            cX = int((startX + endX) / 2.0)
-            cY = int((startY + endY) / 2.0)
-            input_centroids[i] = (cX, cY)
+        # Derive the centroid of every bounding box in one vectorized
+        # expression instead of looping over the rectangles in Python.
+        # The integer shift halves the corner sums without a float round trip
+        rects_arr = np.asarray(rects, dtype=np.int32).reshape(-1, 4)
+        input_centroids = np.empty((len(rects_arr), 2), dtype=np.int32)
+        input_centroids[:, 0] = (rects_arr[:, 0] + rects_arr[:, 2]) >> 1
+        input_centroids[:, 1] = (rects_arr[:, 1] + rects_arr[:, 3]) >> 1
 
         # If we are currently not tracking any objects take the input
         # centroids and register each of them
-        if len(self.objects) == 0:
+        if len(self._ids) == 0:
             for i in range(0, len(input_centroids)):
-                self.register(input_centroids[i])
+                self.register(input_centroids[i], now)
 
         # Otherwise, there are currently tracking objects so we need to
         # try to match the input centroids to existing object
         # centroids
         else:
-            # Grab the set of object IDs and corresponding centroids
-            object_ids = list(self.objects.keys())
-            object_centroids = [ball.centroid for ball in self.objects.values()]
-            object_falling_states = [ball.is_falling for ball in self.objects.values()]
-            
-            # compute the distance between each pair of object
-            # centroids and input centroids, respectively -- our
-            # goal will be to match an input centroid to an existing
-            # object centroid
-            D = dist.cdist(np.array(object_centroids), input_centroids)
-
-            # Calculate the coordinate difference between the stored object
-            # centroids and input centroids. This will tell us whether an
-            # input centroid is above/below and left/right of the stored 
-            # object centroid
-            pos_diff = np.zeros(
-                (len(object_centroids), len(input_centroids)),
-                dtype=np.dtype((np.float32, (2,)))
+            # Run the numeric matching core on the state arrays directly;
+            # only the bookkeeping around the returned pairs stays here
+            rows, cols, D = _match_centroids(
+                self._centroid_xy, input_centroids,
+                self._is_falling, self.reacquisition_dist
+            )
+
+            # Drop the assignment pairs whose cost hit the sentinel: those
+            # objects are outside of the reacquisition distance. When the
+            # masking ruled out every pair, no rows/cols come back at all
+            # and every input centroid falls through to registration below
+            valid = D[rows, cols] < UNMATCHABLE_DIST
+            rows = rows[valid]
+            cols = cols[valid]
+            new_xy = input_centroids[cols]
+
+            # Update every matched ball's falling state, centroid, max
+            # height centroid and last seen timestamp in bulk array ops
+            # instead of a per-ball Python loop
+            # NOTE: if the ball is closer to the ground, its y-coord is HIGHER
+            self._is_falling[rows] = self._centroid_xy[rows, 1] < new_xy[:, 1]
+
+            higher = new_xy[:, 1] < self._max_height_xy[rows, 1]
+            self._max_height_xy[rows[higher]] = new_xy[higher]
+
+            self._centroid_xy[rows] = new_xy
+            self._last_seen[rows] = now
+
+            # Compute the input centroid indexes that were NOT matched.
+            # setdiff1d takes the complement in C instead of allocating
+            # two Python sets per frame
+            unused_cols = np.setdiff1d(
+                np.arange(D.shape[1]), cols, assume_unique=True
             )
-            for i, _ in enumerate(pos_diff):
-                for j, _ in enumerate(pos_diff[i]):
-                    pos_diff[i][j] = (
-                        object_centroids[i][0] - input_centroids[j][0],
-                        object_centroids[i][1] - input_centroids[j][1]
-                    )
-
-            # Filter out results that are outside of object centroid's requisition range
-            for i, row in enumerate(D):
-                # If any of the distances are grater than the currentReacquisitionDist
-                # then set their distance to infinity. This will make sure that we
-                # don't consider this distance for reacquisition
-                for j, col in enumerate(row):
-                    D[i][j] = float('inf') if col > self.reacquisition_dist else col
-
-            # For the objects that are already falling, filter out the results
-            # where the input object is travelling up
-            for i, row in enumerate(D):
-                for j, col in enumerate(row):
-                    # If the ball is falling and the input centroid is above object
-                    # centroid set their distance to infinity. This will make sure that we
-                    # don't consider this distance for reacquisition
-                    # NOTE: if the ball is closer to the ground, 
-                    # pos_diff[i][j][1] will be positive
-                    if object_falling_states[i] and (pos_diff[i][j][1] > 0):
-                        D[i][j] = float('inf')
-
-            # In order to perform this matching we must (1) find the
-            # smallest value in each row and then (2) sort the row
-            # indexes based on their minimum values so that the row
-            # with the smallest value is at the *front* of the index
-            # list
-            rows = D.min(axis=1).argsort()
-
-            # Next, we perform a similar process on the columns by
-            # finding the smallest value in each column and then
-            # sorting using the previously computed row index list
-            cols = D.argmin(axis=1)[rows]
-
-            # In order to determine if we need to update or register
-            # centroids, we need to track the noes that we examined
-            used_cols = set()
-            used_rows = set()
-
-            # Loop over the combination of the (row, column) index
-            # tuples
-            for (row, col) in zip(rows, cols):
-                # Nf we have already examined either the row or
-                # column value before, ignore it
-                if row in used_rows or col in used_cols:
-                    continue
-
-                # If the row + col combination has the distance of infinity
-                # then ignore it as the object is outside of the
-                # reacquisition distance
-                if D[row][col] == float('inf'):
-                    continue
-
-                # Otherwise, grab the object ID for the current row, set its new
-                #  centroid, falling state, and reset the last seen timestamp
-                object_id = object_ids[row]
-                self.objects[object_id].is_falling = self.check_if_falling(
-                    self.objects[object_id].centroid, input_centroids[col]
-                )
-                self.set_objects_centroid(object_id, centroid = tuple(input_centroids[col]))
-                self.objects[object_id].last_seen_timestamp = time.time()
-
-                # Indicate that we have examined each of the row and
-                # column indexes, respectively
-                used_cols.add(col)
-                used_rows.add(row)
-
-            # Compute both the row and column index we have NOT yet examined
-            unused_cols = set(range(0, D.shape[1])).difference(used_cols)
 
             # Register all unused input centroids
             for col in unused_cols:
-                self.register(input_centroids[col])
+                self.register(input_centroids[col], now)
 
         # Return the set of tracked objects
-        return self.objects
\ No newline at end of file
+        return self._as_details_dict()
@@ -1,8 +1,14 @@
 import argparse
+import io
+import os
+import pickle
 import sys
 from configparser import ConfigParser
 from dataclasses import dataclass
 
+# The ini values that get persisted between sessions
+_INI_KEYS = ('frame_width', 'frame_height', 'success_area_y', 'success_area_length')
+
 @dataclass
 class UserSettings:
     """ Class for holding user configurable settings."""
@@ -16,10 +22,23 @@ class UserSettings:
     success_area_y: int
     success_area_length: int
 
+# Command line parser built once at import time; parsing itself happens
+# lazily so repeated ConfigManager instances don't re-consume sys.argv
+_PARSER = argparse.ArgumentParser(description="Record the max height at which juggling balls are thrown")
+_PARSER.add_argument('-s', '--scale', type=float, default=0.4, metavar="SCALE", help="Resize the window size")
+_PARSER.add_argument('-d', '--debug', action='store_true', help="Enable printing of FPS and draw squares around balls")
+_PARSER.add_argument('-t', '--tracktime', type=float, default=0.2, metavar="SECONDS", help="Max time to reacquire a tracked ball")
+_PARSER.add_argument('-r', '--trackrange', type=int, default=150, metavar="PIXELS", help="Max range to reacquire a tracked ball")
+_PARSER.add_argument('-f', '--framerate', type=int, default=24, metavar="FPS", help="Framerate at which to record the output video")
+_PARSER.add_argument('--reset', action='store_true', help="Reset settings to their default parameters")
+
 class ConfigManager:
     """ Configuration manager which holds all functions related
-        to user configurable settings 
+        to user configurable settings
     """
+    CONFIG_PATH = '../config.ini'
+    CACHE_PATH = '../config.ini.cache'
+
     default_settings = UserSettings(
         scale = 0.4,
         frame_width = 680,
@@ -37,46 +56,120 @@ class ConfigManager:
 
         # Read settings from ini file
         self._config = ConfigParser()
-        # User either requested to reset settings or couldn't read config.ini file
-        if self._args.reset or not self._config.read('../config.ini'):
+
+        # User either requested to reset settings or there is no config.ini
+        ini_values = None if self._args.reset else self._read_ini_values()
+
+        if ini_values is None:
             self._settings = ConfigManager.default_settings
         else:
-            frame_width = int(self._config.get('settings', 'frame_width'))
-            frame_height = int(self._config.get('settings', 'frame_height'))
-            success_area_y = int(self._config.get('settings', 'success_area_y'))
-            success_area_length = int(self._config.get('settings', 'success_area_length'))
-
             self._settings = UserSettings(
                 scale = self._args.scale,
-                frame_width = frame_width,
-                frame_height = frame_height,
+                frame_width = ini_values['frame_width'],
+                frame_height = ini_values['frame_height'],
                 debug = self._args.debug,
                 tracktime = self._args.tracktime,
                 trackrange = self._args.trackrange,
                 framerate = self._args.trackrange,
-                success_area_y = success_area_y,
-                success_area_length = success_area_length,
+                success_area_y = ini_values['success_area_y'],
+                success_area_length = ini_values['success_area_length'],
             )
 
+    def _read_ini_values(self):
+        """ Return the persisted ini values as a dict of ints, or None if
+            config.ini can't be read. The parsed values are cached next to
+            the file keyed by its mtime, so unchanged files skip the
+            ConfigParser work entirely on later starts
+        """
+        try:
+            mtime = os.path.getmtime(self.CONFIG_PATH)
+        except OSError:
+            return None
+
+        # Fast path: reuse the cached parse if config.ini hasn't changed
+        try:
+            with open(self.CACHE_PATH, 'rb') as f:
+                cached_mtime, values = pickle.load(f)
+            if cached_mtime == mtime:
+                return values
+        except (OSError, pickle.PickleError, EOFError, ValueError):
+            pass
+
+        values = self._parse_ini_fast()
+
+        if values is None:
+            # Fall back to the full ConfigParser for anything the simple
+            # reader didn't understand
+            if not self._config.read(self.CONFIG_PATH):
+                return None
+            values = {key: int(self._config.get('settings', key)) for key in _INI_KEYS}
+
+        # Remember this parse for the next start
+        try:
+            with open(self.CACHE_PATH, 'wb') as f:
+                pickle.dump((mtime, values), f)
+        except OSError:
+            pass
+
+        return values
+
+    def _parse_ini_fast(self):
+        """ Minimal line-based reader for the simple config.ini this app
+            writes itself: one [settings] section of key = value pairs.
+            Returns the ini values as a dict of ints, or None if the file
+            doesn't look like that (the caller then falls back to the full
+            ConfigParser)
+        """
+        try:
+            data = {}
+            with open(self.CONFIG_PATH) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith((';', '#', '[')):
+                        continue
+                    if '=' not in line:
+                        return None
+                    key, _, value = line.partition('=')
+                    data[key.strip()] = value.strip()
+
+            return {key: int(data[key]) for key in _INI_KEYS}
+        except (OSError, KeyError, ValueError):
+            return None
+
+    # Parsed command line arguments shared by every instance; filled in on
+    # the first parse_args call
+    _cached_args = None
+
     def parse_args(self):
-        """ Read in user passed command line arguments """
-        # Parse command line arguments
-        parser = argparse.ArgumentParser(description="Record the max height at which juggling balls are thrown")
-        parser.add_argument('-s', '--scale', type=float, default=0.4, metavar="", help="Resize the window size")
-        parser.add_argument('-d', '--debug', action='store_true', help="Enable printing of FPS and draw squares around balls")
-        parser.add_argument('-t', '--tracktime', type=float, default=0.2, metavar="", help="Max time to reacquire a tracked ball")
-        parser.add_argument('-r', '--trackrange', type=int, default=150, metavar="", help="Max range to reacquire a tracked ball")
-        parser.add_argument('-f', '--framerate', type=int, default=24, metavar="", help="Framerate at which to record the output video")
-        parser.add_argument('--reset', action='store_true', help="Reset settings to their default parameters")
-        
-        self._args = parser.parse_args()
+        """ Read in user passed command line arguments. They are parsed at
+            most once per process and cached for later instances
+        """
+        if ConfigManager._cached_args is None:
+            if len(sys.argv) == 1:
+                # The common case is launching with no flags at all; skip
+                # the argparse machinery and use the defaults directly.
+                # NOTE: must mirror the defaults declared on _PARSER
+                ConfigManager._cached_args = argparse.Namespace(
+                    scale = 0.4,
+                    debug = False,
+                    tracktime = 0.2,
+                    trackrange = 150,
+                    framerate = 24,
+                    reset = False
+                )
+            else:
+                ConfigManager._cached_args = _PARSER.parse_args()
+
+        self._args = ConfigManager._cached_args
 
     def get_settings(self):
         """ Return command line arguments """
         return self._settings
 
     def set_settings(self, settings: UserSettings):
-        """ Write user settings to config.ini file """
+        """ Write user settings to config.ini file, skipping the disk write
+            when nothing actually changed
+        """
         if not self._config.has_section('settings'):
             self._config.add_section('settings')
 
@@ -85,5 +178,28 @@ class ConfigManager:
         self._config.set('settings', 'success_area_y', str(settings.success_area_y))
         self._config.set('settings', 'success_area_length', str(settings.success_area_length))
 
-        with open('../config.ini', 'w') as f: 
-            self._config.write(f)
\ No newline at end of file
+        # Serialize to memory first so the new content can be compared
+        # against what is already on disk
+        buf = io.StringIO()
+        self._config.write(buf)
+        content = buf.getvalue()
+
+        # Skip the write (and the mtime bump that would invalidate the
+        # parse cache) when the file already holds the same values
+        try:
+            with open(self.CONFIG_PATH) as f:
+                if f.read() == content:
+                    return
+        except OSError:
+            pass
+
+        with open(self.CONFIG_PATH, 'w') as f:
+            f.write(content)
+
+        # Refresh the parse cache so the next start takes the fast path
+        try:
+            values = {key: getattr(settings, key) for key in _INI_KEYS}
+            with open(self.CACHE_PATH, 'wb') as f:
+                pickle.dump((os.path.getmtime(self.CONFIG_PATH), values), f)
+        except OSError:
+            pass
\ No newline at end of file
@@ -1,21 +1,18 @@
 import time
-from dataclasses import dataclass
-from collections import OrderedDict
-from typing import Tuple, OrderedDict
-
+from typing import Tuple, Dict
 
 import cv2
+import numpy as np
+
 from audio_manager import SoundFactory, Sound
 
-@dataclass
-class DrawPoint:
-    """ Used to record a success/fail point of where a ball has reached max height.
-        Also records the time when it started drawing it so that the point 
-        disappears after a certain amount of time.
-    """
-    draw_centroid: Tuple[int, int]
-    starting_time: float
-    is_successful: bool
+def _make_dot_mask(radius: int) -> np.ndarray:
+    """ Boolean stamp of a filled circle, rendered once so that drawing a
+        dot becomes a masked slice assignment instead of a cv2.circle call """
+    size = 2 * radius + 1
+    mask = np.zeros((size, size), dtype=np.uint8)
+    cv2.circle(mask, (radius, radius), radius, 1, -1)
+    return mask.astype(bool)
 
 class HUDController:
     """ This class is used to count and mark the juggling balls which reached a
@@ -23,55 +20,120 @@ class HUDController:
         reached max height in the desirable boundary box
     """
 
+    # Drawing constants resolved once at class creation instead of being
+    # looked up / rebuilt on every frame
+    _FONT = cv2.FONT_HERSHEY_SIMPLEX
+    _COUNTER_COLOR = (132, 224, 190)
+
+    # How long a success/fail point stays on screen, in nanoseconds
+    _POINT_EXPIRY_NS = 500_000_000
+
+    # Success/fail dot size and its precomputed circle stamp
+    _DOT_RADIUS = 4
+    _DOT_MASK = _make_dot_mask(_DOT_RADIUS)
+
     def __init__(self, success_area_y, success_area_length, frame_width):
-        self.current_draw_points: OrderedDict[int, DrawPoint] = OrderedDict()
-        self.drawn_ball_ids = []
-        self.not_drawn_balls: OrderedDict[int, Tuple[int, int]] = OrderedDict()
+        # The success/fail points being drawn are kept as a struct-of-arrays:
+        # one row per point across the parallel arrays below (position,
+        # creation time, whether the throw was successful). Expiry then
+        # becomes a single vectorized comparison instead of a dict walk
+        self._point_xy = np.empty((0, 2), dtype=np.int32)
+        self._point_start = np.empty(0, dtype=np.int64)
+        self._point_success = np.empty(0, dtype=bool)
+
+        # Set membership keeps the already-drawn checks O(1) as ids
+        # accumulate over a session
+        self.drawn_ball_ids = set()
+        # Plain dicts preserve insertion order since Python 3.7, so no
+        # OrderedDict overhead is needed here
+        self.not_drawn_balls: Dict[int, Tuple[int, int]] = {}
         self.successes = 0
         self.failures = 0
 
+        # Rendered success counter text, rebuilt only when the counts change
+        self._counter_text = ""
+        self._last_counts = None
+
         # Create success/failure sounds
         sound_factory = SoundFactory()
         self.success_sound = sound_factory.create_audio(seconds = 0.1, frequency = 1000)
         self.failure_sound = sound_factory.create_audio(seconds = 0.1, frequency = 300)
 
+        # The caller passes ints straight from UserSettings, so no defensive
+        # casts are needed here.
         # Starting y coordinate for drawing the height boundary box
-        self.start_y = int(success_area_y)
+        self.start_y = success_area_y
         # The vertical length of the boundary box
-        self.length = int(success_area_length)
+        self.length = success_area_length
         # The horizontal width of the boundary box
-        self.frame_width = int(frame_width)
+        self.frame_width = frame_width
+
+        self._recompute_boundary()
+
+    def _recompute_boundary(self):
+        """ Refresh the derived boundary values. These only change on a
+            keypress, so the per-frame draw and per-ball height checks
+            reuse them instead of rebuilding tuples every call """
+        self._end_y = self.start_y + self.length
+        self._rect_p1 = (-1, self.start_y)
+        self._rect_p2 = (self.frame_width, self._end_y)
+
+        # Specialized bounds check closing over the current boundary as
+        # default-argument constants. The boundary only moves on a keypress,
+        # so per-ball checks skip the attribute loads and the addition
+        self._is_inside_boundary = (
+            lambda y, _start=self.start_y, _end=self._end_y: _start <= y <= _end
+        )
 
     def draw_ball_points(self, frame, tracked_balls):
         """ Record all newly tracked balls and if the ball started falling,
             then start drawing its max point reached.
             Also draw success/fail statistics and max height box
         """
+        # Read the clock once per frame; every timing decision below uses
+        # the same "now" instead of paying a clock read per ball/point.
+        # The monotonic integer clock can't jump with wall-clock changes
+        # and compares as plain int64s in the expiry mask
+        now = time.monotonic_ns()
+
         for ball_id, ball_value in tracked_balls.items():
+            # Both checks below need to know whether this ball has already
+            # been drawn, so pay for the lookup once
+            already_drawn = ball_id in self.drawn_ball_ids
+
             # If this is the first time we are tracking this ball,
             # then note down its id
-            if (
-                    (not ball_id in self.drawn_ball_ids) and 
-                    (not ball_id in self.not_drawn_balls)
-                ):
-                self.not_drawn_balls[ball_id] = tuple(ball_value.max_height_centroid)
+            if not already_drawn and not ball_id in self.not_drawn_balls:
+                # max_height_centroid is already a tuple, so store it as-is
+                self.not_drawn_balls[ball_id] = ball_value.max_height_centroid
 
             # Register a draw point if it started falling
-            if not ball_id in self.drawn_ball_ids and ball_value.is_falling:
-                self.register_draw_point(ball_id, ball_value.max_height_centroid)
+            if not already_drawn and ball_value.is_falling:
+                self.register_draw_point(ball_id, ball_value.max_height_centroid, now)
 
         new_not_drawn_balls = {}
         for ball_id, max_height_centroid in self.not_drawn_balls.items():
+            # A ball drawn above (or on an earlier frame) is done with;
+            # drop its pending entry so it can't be registered a second
+            # time once its id gets pruned from drawn_ball_ids
+            if ball_id in self.drawn_ball_ids:
+                continue
+
             # Register a draw point if it has disappeared for too long.
             # To check this we will see if any previously tracked balls is
             # no longer tracked, but hasn't been drawn yet
-            if not ball_id in tracked_balls and not ball_id in self.drawn_ball_ids:
-                self.register_draw_point(ball_id, max_height_centroid)
+            if not ball_id in tracked_balls:
+                self.register_draw_point(ball_id, max_height_centroid, now)
             else:
                 new_not_drawn_balls[ball_id] = max_height_centroid
         self.not_drawn_balls = new_not_drawn_balls
 
-        self.draw_recorded_points(frame)
+        # Tracker ids are never reused, so a drawn id that is no longer
+        # tracked can never come back; dropping those keeps the set from
+        # growing for the whole session
+        self.drawn_ball_ids.intersection_update(tracked_balls)
+
+        self.draw_recorded_points(frame, now)
 
     def get_successes(self) -> int:
         return self.successes
@@ -82,14 +144,13 @@ class HUDController:
     def draw_boundary(self, frame):
         """ Draw a rectangle that represents where juggling balls 
             should be at their heighest"""
-        end_y = self.start_y + self.length
-        
         # setting start_x as -1 prevents the left edge line from being drawn
-        cv2.rectangle(frame, (-1, self.start_y), (self.frame_width, end_y), (0, 255, 0), 1)
+        cv2.rectangle(frame, self._rect_p1, self._rect_p2, (0, 255, 0), 1)
 
     def change_boundary_y_pos(self, amount: int = 2):
         """ Raise or lower height boundary"""
         self.start_y += amount
+        self._recompute_boundary()
 
     def change_boundary_length(self, amount: int = 2):
         """ Increase or decrease length of the boundary"""
@@ -99,48 +160,63 @@ class HUDController:
             self.length = new_length
         else:
             self.length = 0
+        self._recompute_boundary()
 
     def is_successful_throw(self, ball_height: int):
         """ Returns true if the ball's max height was inside a boundary
             box (success) and false if its max height was outside the
             boundary box (failure) """
         # Check if max height is inside the boundary box
-        if ball_height >= self.start_y and ball_height <= (self.start_y + self.length):
-            return True
-        # Or outside it
-        else:
-            return False
+        return self._is_inside_boundary(ball_height)
     
-    def draw_recorded_points(self, frame):
+    def draw_recorded_points(self, frame, now = None):
         """ Draws a green/red dot for successful/unsuccesful throw """
-        draw_points_to_remove = []
-        
-        # Draw existing height points
-        for object_id, recorded_point in self.current_draw_points.items():
-            time_since_drawn = time.time() - recorded_point.starting_time
-
-            # if it's been longer than 0.5 secs since the last time this point 
-            # was drawn, then don't draw it anymore
-            if time_since_drawn > 0.5:
-                draw_points_to_remove.append(object_id)
-            else:
-                draw_color = (0, 255, 0) if recorded_point.is_successful else (0, 0, 255)
-                cv2.circle(frame, recorded_point.draw_centroid, 4, draw_color, -1)
-        
-        # Remove points that have already been drawn for a while
-        for id in draw_points_to_remove:
-            del self.current_draw_points[id]
+        if now is None:
+            now = time.monotonic_ns()
+
+        # Drop the points that have been on screen for too long with one
+        # vectorized integer comparison and compaction
+        alive = (now - self._point_start) <= self._POINT_EXPIRY_NS
+        if not alive.all():
+            self._point_xy = self._point_xy[alive]
+            self._point_start = self._point_start[alive]
+            self._point_success = self._point_success[alive]
+
+        # Stamp the surviving height points straight into the frame with a
+        # masked slice assignment of the precomputed circle. One memcpy per
+        # dot replaces the per-point cv2.circle Python->C call; only dots
+        # clipped by the frame edge fall back to cv2.circle
+        r = self._DOT_RADIUS
+        size = 2 * r + 1
+        frame_h, frame_w = frame.shape[:2]
+        for success, colour in ((True, (0, 255, 0)), (False, (0, 0, 255))):
+            group = self._point_success if success else ~self._point_success
+            for x, y in self._point_xy[group].tolist():
+                x0, y0 = x - r, y - r
+                if 0 <= x0 and 0 <= y0 and x0 + size <= frame_w and y0 + size <= frame_h:
+                    frame[y0:y0 + size, x0:x0 + size][self._DOT_MASK] = colour
+                else:
+                    cv2.circle(frame, (x, y), r, colour, -1)
 
     def draw_success_counters(self, frame):
         """ Draws a counter and a percentage of successful throws """
-        # Calculate success percentage and check that there's no div by 0
-        success_percentage = self.successes / (self.failures + self.successes) * 100 if self.failures else 0
-        text = f"{int(success_percentage)}% = {self.successes} / {self.failures + self.successes}"
-        cv2.putText(frame, text, (0, 15), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (132, 224, 190), 2)
+        counts = (self.successes, self.failures)
 
-    def register_draw_point(self, ball_id, centroid):
+        # Only rebuild the text when a throw actually changed the counts
+        if counts != self._last_counts:
+            # Calculate success percentage and check that there's no div by 0
+            success_percentage = self.successes / (self.failures + self.successes) * 100 if self.failures else 0
+            self._counter_text = f"{int(success_percentage)}% = {self.successes} / {self.failures + self.successes}"
+            self._last_counts = counts
+
+        cv2.putText(frame, self._counter_text, (0, 15), self._FONT, 0.5, self._COUNTER_COLOR, 2)
+
+    def register_draw_point(self, ball_id, centroid, now = None):
         """ Checks whether the ball was thrown to the correct height and
             creates a successful/unsuccessful draw point """
+        if now is None:
+            now = time.monotonic_ns()
+
         is_successful = self.is_successful_throw(centroid[1])
         if is_successful:
             self.successes += 1
@@ -149,10 +225,8 @@ class HUDController:
             self.failures += 1
             self.failure_sound.play()
 
-        # Record a draw point
-        self.current_draw_points[ball_id] = DrawPoint(
-            draw_centroid = centroid,
-            starting_time = time.time(),
-            is_successful = is_successful
-        )
-        self.drawn_ball_ids.append(ball_id)
+        # Record a draw point by appending one row to the point arrays
+        self._point_xy = np.vstack((self._point_xy, np.asarray(centroid, dtype=np.int32)))
+        self._point_start = np.append(self._point_start, now)
+        self._point_success = np.append(self._point_success, is_successful)
+        self.drawn_ball_ids.add(ball_id)